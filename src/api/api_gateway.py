@@ -1,7 +1,8 @@
 import boto3
-import json
+import orjson
 import os
 import logging
+from botocore.config import Config
 from typing import Dict, Any
 
 # Setup logging
@@ -10,8 +11,20 @@ logger = logging.getLogger(__name__)
 # AWS region
 region = os.environ.get('AWS_REGION', 'us-east-1')
 
-# API Gateway client
-api_gateway = boto3.client('apigateway', region_name=region)
+# API Gateway client; control-plane calls are rate limited, so throttled requests
+# (TooManyRequestsException) are retried with adaptive client-side backoff and jitter
+api_gateway = boto3.client(
+    'apigateway',
+    region_name=region,
+    config=Config(retries={'max_attempts': 8, 'mode': 'adaptive'})
+)
+
+# CORS headers returned by the RAG endpoint
+CORS_RESPONSE_PARAMETERS = {
+    'method.response.header.Access-Control-Allow-Origin': "'*'",
+    'method.response.header.Access-Control-Allow-Methods': "'POST,OPTIONS'",
+    'method.response.header.Access-Control-Allow-Headers': "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
+}
 
 
 def create_rest_api(api_name: str, description: str) -> Dict[str, Any]:
@@ -36,11 +49,11 @@ def create_rest_api(api_name: str, description: str) -> Dict[str, Any]:
             disableExecuteApiEndpoint=False
         )
         
-        logger.info(f"Successfully created API: {api_name}")
+        logger.info("Successfully created API: %s", api_name)
         return response
     
     except Exception as e:
-        logger.error(f"Error creating REST API: {str(e)}")
+        logger.error("Error creating REST API: %s", e)
         raise
 
 
@@ -63,11 +76,11 @@ def create_resource(api_id: str, parent_id: str, path_part: str) -> Dict[str, An
             pathPart=path_part
         )
         
-        logger.info(f"Successfully created resource: {path_part}")
+        logger.info("Successfully created resource: %s", path_part)
         return response
     
     except Exception as e:
-        logger.error(f"Error creating resource: {str(e)}")
+        logger.error("Error creating resource: %s", e)
         raise
 
 
@@ -94,11 +107,11 @@ def create_method(api_id: str, resource_id: str, http_method: str,
             apiKeyRequired=False
         )
         
-        logger.info(f"Successfully created method: {http_method}")
+        logger.info("Successfully created method: %s", http_method)
         return response
     
     except Exception as e:
-        logger.error(f"Error creating method: {str(e)}")
+        logger.error("Error creating method: %s", e)
         raise
 
 
@@ -129,11 +142,11 @@ def create_integration(api_id: str, resource_id: str, http_method: str,
             timeoutInMillis=29000
         )
         
-        logger.info(f"Successfully created integration for method: {http_method}")
+        logger.info("Successfully created integration for method: %s", http_method)
         return response
     
     except Exception as e:
-        logger.error(f"Error creating integration: {str(e)}")
+        logger.error("Error creating integration: %s", e)
         raise
 
 
@@ -167,11 +180,11 @@ def create_method_response(api_id: str, resource_id: str,
             }
         )
         
-        logger.info(f"Successfully created method response with status code: {status_code}")
+        logger.info("Successfully created method response with status code: %s", status_code)
         return response
     
     except Exception as e:
-        logger.error(f"Error creating method response: {str(e)}")
+        logger.error("Error creating method response: %s", e)
         raise
 
 
@@ -195,21 +208,17 @@ def create_integration_response(api_id: str, resource_id: str,
             resourceId=resource_id,
             httpMethod=http_method,
             statusCode=status_code,
-            responseParameters={
-                'method.response.header.Access-Control-Allow-Origin': "'*'",
-                'method.response.header.Access-Control-Allow-Methods': "'POST,OPTIONS'",
-                'method.response.header.Access-Control-Allow-Headers': "'Content-Type,X-Amz-Date,Authorization,X-Api-Key,X-Amz-Security-Token'"
-            },
+            responseParameters=CORS_RESPONSE_PARAMETERS,
             responseTemplates={
                 'application/json': ''
             }
         )
         
-        logger.info(f"Successfully created integration response with status code: {status_code}")
+        logger.info("Successfully created integration response with status code: %s", status_code)
         return response
     
     except Exception as e:
-        logger.error(f"Error creating integration response: {str(e)}")
+        logger.error("Error creating integration response: %s", e)
         raise
 
 
@@ -233,11 +242,11 @@ def deploy_api(api_id: str, stage_name: str, stage_description: str) -> Dict[str
             description=f'Deployment to {stage_name} stage'
         )
         
-        logger.info(f"Successfully deployed API to stage: {stage_name}")
+        logger.info("Successfully deployed API to stage: %s", stage_name)
         return response
     
     except Exception as e:
-        logger.error(f"Error deploying API: {str(e)}")
+        logger.error("Error deploying API: %s", e)
         raise
 
 
@@ -272,10 +281,111 @@ def update_cors_for_resource(api_id: str, resource_id: str) -> None:
         # Create integration response for OPTIONS method
         create_integration_response(api_id, resource_id, 'OPTIONS', '200')
         
-        logger.info(f"Successfully updated CORS for resource")
+        logger.info("Successfully updated CORS for resource")
     
     except Exception as e:
-        logger.error(f"Error updating CORS for resource: {str(e)}")
+        logger.error("Error updating CORS for resource: %s", e)
+        raise
+
+
+def build_openapi_spec(api_name: str, description: str, lambda_function_arn: str) -> Dict[str, Any]:
+    """
+    Build an OpenAPI definition of the RAG API, including the Lambda proxy
+    integration and the CORS preflight mock, for import into API Gateway.
+    
+    Args:
+        api_name (str): The name of the API
+        description (str): A description of the API
+        lambda_function_arn (str): The ARN of the Lambda function
+        
+    Returns:
+        Dict[str, Any]: The OpenAPI 3.0 definition
+    """
+    cors_headers = {
+        parameter.rsplit('.', 1)[-1]: {'schema': {'type': 'string'}}
+        for parameter in CORS_RESPONSE_PARAMETERS
+    }
+    
+    return {
+        'openapi': '3.0.1',
+        'info': {
+            'title': api_name,
+            'description': description,
+            'version': '1.0'
+        },
+        'paths': {
+            '/rag': {
+                'post': {
+                    'responses': {
+                        '200': {
+                            'description': 'RAG response',
+                            'headers': cors_headers
+                        }
+                    },
+                    'x-amazon-apigateway-integration': {
+                        'type': 'aws_proxy',
+                        'httpMethod': 'POST',
+                        'uri': f'arn:aws:apigateway:{region}:lambda:path/2015-03-31/functions/{lambda_function_arn}/invocations',
+                        'passthroughBehavior': 'when_no_match',
+                        'contentHandling': 'CONVERT_TO_TEXT',
+                        'timeoutInMillis': 29000
+                    }
+                },
+                'options': {
+                    'responses': {
+                        '200': {
+                            'description': 'CORS preflight response',
+                            'headers': cors_headers
+                        }
+                    },
+                    'x-amazon-apigateway-integration': {
+                        'type': 'mock',
+                        'passthroughBehavior': 'when_no_match',
+                        'requestTemplates': {
+                            'application/json': '{"statusCode": 200}'
+                        },
+                        'responses': {
+                            'default': {
+                                'statusCode': '200',
+                                'responseParameters': CORS_RESPONSE_PARAMETERS,
+                                'responseTemplates': {
+                                    'application/json': ''
+                                }
+                            }
+                        }
+                    }
+                }
+            }
+        },
+        'x-amazon-apigateway-api-key-source': 'HEADER'
+    }
+
+
+def import_rest_api(openapi_spec: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Create a REST API with all its resources, methods and integrations from
+    an OpenAPI definition in a single API Gateway call.
+    
+    Args:
+        openapi_spec (Dict[str, Any]): The OpenAPI definition
+        
+    Returns:
+        Dict[str, Any]: The API Gateway response
+    """
+    try:
+        response = api_gateway.import_rest_api(
+            failOnWarnings=True,
+            parameters={
+                'endpointConfigurationTypes': 'REGIONAL'
+            },
+            body=orjson.dumps(openapi_spec)
+        )
+        
+        logger.info("Successfully imported API: %s", response['name'])
+        return response
+    
+    except Exception as e:
+        logger.error("Error importing REST API: %s", e)
         raise
 
 
@@ -283,6 +393,9 @@ def setup_api_gateway(api_name: str, description: str, lambda_function_arn: str)
     """
     Set up a complete API Gateway for the RAG application.
     
+    The API is imported from an OpenAPI definition and then deployed, which
+    takes two API Gateway calls instead of one per resource, method and response.
+    
     Args:
         api_name (str): The name of the API
         description (str): A description of the API
@@ -292,46 +405,20 @@ def setup_api_gateway(api_name: str, description: str, lambda_function_arn: str)
         str: The API Gateway invoke URL
     """
     try:
-        # Create the API
-        api = create_rest_api(api_name, description)
+        # Create the API with the RAG endpoint, Lambda integration and CORS in one call
+        openapi_spec = build_openapi_spec(api_name, description, lambda_function_arn)
+        api = import_rest_api(openapi_spec)
         api_id = api['id']
         
-        # Get the root resource ID
-        resources = api_gateway.get_resources(restApiId=api_id)
-        root_id = None
-        for resource in resources['items']:
-            if resource['path'] == '/':
-                root_id = resource['id']
-                break
-        
-        # Create a resource for the RAG endpoint
-        rag_resource = create_resource(api_id, root_id, 'rag')
-        rag_resource_id = rag_resource['id']
-        
-        # Create a POST method for the RAG endpoint
-        create_method(api_id, rag_resource_id, 'POST', 'NONE')
-        
-        # Create a Lambda integration for the POST method
-        create_integration(api_id, rag_resource_id, 'POST', lambda_function_arn)
-        
-        # Create a method response for the POST method
-        create_method_response(api_id, rag_resource_id, 'POST', '200')
-        
-        # Create an integration response for the POST method
-        create_integration_response(api_id, rag_resource_id, 'POST', '200')
-        
-        # Update CORS for the RAG endpoint
-        update_cors_for_resource(api_id, rag_resource_id)
-        
         # Deploy the API to a stage
         deploy_api(api_id, 'prod', 'Production stage')
         
         # Construct the invoke URL
         invoke_url = f'https://{api_id}.execute-api.{region}.amazonaws.com/prod/rag'
         
-        logger.info(f"API Gateway setup complete. Invoke URL: {invoke_url}")
+        logger.info("API Gateway setup complete. Invoke URL: %s", invoke_url)
         return invoke_url
     
     except Exception as e:
-        logger.error(f"Error setting up API Gateway: {str(e)}")
+        logger.error("Error setting up API Gateway: %s", e)
         raise
@@ -1,24 +1,59 @@
 import os
-import json
+import orjson
 import logging
-import sys
-
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-
-from aws_lambda_powertools import Logger
-from aws_lambda_powertools.utilities.typing import LambdaContext
-from aws_lambda_powertools.utilities.data_classes import APIGatewayProxyEvent
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
 
 # Import our utility modules
 from utils.bedrock_embeddings import create_embeddings
 from utils.bedrock_generation import generate_response
-from utils.opensearch_client import search_vectors
+from utils.opensearch_client import search_vectors, keyword_search, reciprocal_rank_fusion
+
+# Setup logging; the Lambda runtime already forwards the root logger to CloudWatch
+logger = logging.getLogger()
+logger.setLevel(os.environ.get('LOG_LEVEL', 'INFO').upper())
+
+# Prompt sent to the generative model, filled in with the retrieved context and the user's question
+PROMPT_TEMPLATE = (
+    "You are a helpful assistant with access to the following information:\n\n"
+    "{context}\n\n"
+    "Based on this information, please answer the following question:\n"
+    "{question}\n\n"
+    "If the information provided doesn't contain the answer, please say so. "
+    "Only use the information provided to construct your answer."
+)
+
+# Returned without calling the generative model when retrieval finds nothing
+NO_CONTEXT_RESPONSE = "No relevant context found."
+
+# Headers for successful responses
+RESPONSE_HEADERS = {
+    'Content-Type': 'application/json',
+    'Access-Control-Allow-Origin': '*',
+    'Access-Control-Allow-Methods': 'POST, OPTIONS',
+    'Access-Control-Allow-Headers': 'Content-Type'
+}
+
+# Runs the keyword search alongside the embedding request; kept across warm invocations.
+# Lambda runs one invocation per container, so the default is plenty; RETRIEVAL_WORKERS
+# only needs raising when several invocations share a process (local load tests)
+retrieval_executor = ThreadPoolExecutor(max_workers=int(os.environ.get('RETRIEVAL_WORKERS', 2)))
+
+
+def unique_contents(search_results):
+    """
+    Yield the content of each retrieved document once, in rank order, so
+    duplicate chunks don't waste the model's context window.
+    """
+    seen = set()
+    for result in search_results:
+        content = result.get('content', '')
+        if content and content not in seen:
+            seen.add(content)
+            yield content
 
-# Setup logging
-logger = Logger(service="bedrock-rag-service")
 
-def lambda_handler(event: APIGatewayProxyEvent, context: LambdaContext):
+def lambda_handler(event: Dict[str, Any], context: Any) -> Dict[str, Any]:
     """
     Main Lambda handler function that processes API Gateway requests,
     generates embeddings, searches for context in OpenSearch,
@@ -29,64 +64,65 @@ def lambda_handler(event: APIGatewayProxyEvent, context: LambdaContext):
         
         # Parse the incoming request
         if isinstance(event.get('body'), str):
-            body = json.loads(event.get('body', '{}'))
+            body = orjson.loads(event.get('body', '{}'))
         else:
             body = event.get('body', {}) or {}
         
-        user_prompt = body.get('prompt', '')
+        # Whitespace-only prompts are rejected before paying for an embedding
+        user_prompt = (body.get('prompt') or '').strip()
         if not user_prompt:
             return {
                 'statusCode': 400,
-                'body': json.dumps({'error': 'No prompt provided'})
+                'body': orjson.dumps({'error': 'No prompt provided'}).decode()
             }
         
-        # Step 1: Convert the user prompt into embeddings
+        # Step 1: Start the keyword search, then convert the user prompt into embeddings
+        # while it runs so the embedding latency is hidden behind the search
         logger.info("Generating embeddings for user prompt")
+        keyword_future = retrieval_executor.submit(keyword_search, user_prompt)
         embeddings = create_embeddings(user_prompt)
         
-        # Step 2: Search for relevant context in OpenSearch
+        # Step 2: Search for relevant context in OpenSearch and merge it with the keyword hits
         logger.info("Searching for relevant context in OpenSearch")
-        search_results = search_vectors(embeddings)
+        vector_results = search_vectors(embeddings)
+        search_results = reciprocal_rank_fusion([vector_results, keyword_future.result()])
         
         # Step 3: Format retrieved context for prompt enrichment
-        context = ""
-        if search_results and len(search_results) > 0:
-            context = "\n\n".join([result.get('content', '') for result in search_results])
-            logger.info(f"Retrieved {len(search_results)} context items")
-        
-        # Step 4: Generate a response using Bedrock with the enriched context
-        logger.info("Generating response with Bedrock")
-        enriched_prompt = f"""
-        You are a helpful assistant with access to the following information:
+        context = "\n\n".join(unique_contents(search_results))
         
-        {context}
+        # Skip the generation round-trip when there is no context to ground the answer in
+        if not context:
+            logger.info("No context retrieved, skipping generation")
+            return {
+                'statusCode': 200,
+                'headers': RESPONSE_HEADERS,
+                'body': orjson.dumps({
+                    'response': NO_CONTEXT_RESPONSE,
+                    'context_retrieved': False
+                }).decode()
+            }
         
-        Based on this information, please answer the following question:
-        {user_prompt}
+        logger.info("Retrieved %s context items", len(search_results))
         
-        If the information provided doesn't contain the answer, please say so. Only use the information provided to construct your answer.
-        """
+        # Step 4: Generate a response using Bedrock with the enriched context
+        logger.info("Generating response with Bedrock")
+        enriched_prompt = PROMPT_TEMPLATE.format_map({'context': context, 'question': user_prompt})
         
         response = generate_response(enriched_prompt)
         
         # Step 5: Return the generated response
         return {
             'statusCode': 200,
-            'headers': {
-                'Content-Type': 'application/json',
-                'Access-Control-Allow-Origin': '*',
-                'Access-Control-Allow-Methods': 'POST, OPTIONS',
-                'Access-Control-Allow-Headers': 'Content-Type'
-            },
-            'body': json.dumps({
+            'headers': RESPONSE_HEADERS,
+            'body': orjson.dumps({
                 'response': response,
-                'context_retrieved': bool(context)
-            })
+                'context_retrieved': True
+            }).decode()
         }
         
     except Exception as e:
         logger.exception("Error processing request")
         return {
             'statusCode': 500,
-            'body': json.dumps({'error': f'Internal server error: {str(e)}'})
+            'body': orjson.dumps({'error': f'Internal server error: {str(e)}'}).decode()
         }
@@ -1,13 +1,12 @@
 import os
-import sys
 import json
+import math
+import time
 import argparse
 import logging
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
 
-# Add parent directory to path for imports
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
-
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
@@ -42,29 +41,81 @@ def create_mock_event(prompt):
         "stageVariables": None
     }
 
+def percentile(sorted_values, pct):
+    """
+    Return the nearest-rank percentile of an already sorted list.
+    """
+    index = max(0, min(len(sorted_values) - 1, math.ceil(pct / 100 * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+def run_load_test(lambda_handler, prompt, concurrency, iterations):
+    """
+    Invoke the handler repeatedly from a thread pool and report latency percentiles.
+    """
+    def timed_call(_):
+        start = time.perf_counter()
+        response = lambda_handler(create_mock_event(prompt), None)
+        return time.perf_counter() - start, response
+    
+    logger.info("Running %s invocations with concurrency %s", iterations, concurrency)
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(timed_call, range(iterations)))
+    wall_time = time.perf_counter() - wall_start
+    
+    latencies = sorted(latency for latency, _ in results)
+    errors = sum(1 for _, response in results
+                 if not isinstance(response, dict) or response.get('statusCode') != 200)
+    
+    print("\n" + "-" * 80)
+    print("Load Test Results:")
+    print("-" * 80)
+    print(f"Invocations: {iterations} (concurrency {concurrency}), errors: {errors}")
+    print(f"Wall time: {wall_time:.2f}s, throughput: {iterations / wall_time:.2f} req/s")
+    print(f"Latency p50: {percentile(latencies, 50) * 1000:.0f} ms, "
+          f"p95: {percentile(latencies, 95) * 1000:.0f} ms, "
+          f"p99: {percentile(latencies, 99) * 1000:.0f} ms")
+    print("-" * 80)
+
 def main():
     parser = argparse.ArgumentParser(description='Test RAG application locally')
     parser.add_argument('--prompt', '-p', type=str, required=True, help='User prompt to test')
     parser.add_argument('--env-file', '-e', type=str, default='.env', help='Path to .env file')
+    parser.add_argument('--concurrency', '-c', type=int, default=1, help='Number of concurrent invocations for load testing')
+    parser.add_argument('--iterations', '-n', type=int, default=1, help='Total number of invocations for load testing')
     
     args = parser.parse_args()
     
     # Load environment variables from specified .env file
     if os.path.exists(args.env_file):
         load_dotenv(args.env_file)
-        logger.info(f"Loaded environment variables from {args.env_file}")
+        logger.info("Loaded environment variables from %s", args.env_file)
     else:
-        logger.warning(f"Environment file {args.env_file} not found, using default environment variables")
+        logger.warning("Environment file %s not found, using default environment variables", args.env_file)
+    
+    # Repeated prompts would be served from the embedding cache after the first call,
+    # so disable it under load to measure real Bedrock embedding latency. All
+    # invocations share one process here, so give every concurrent call its own
+    # keyword-search worker, as it would have in its own Lambda container.
+    load_test = args.iterations > 1 or args.concurrency > 1
+    if load_test:
+        os.environ['EMBEDDING_CACHE_SIZE'] = '0'
+        os.environ['RETRIEVAL_WORKERS'] = str(max(2, args.concurrency))
     
     # Import the Lambda handler
     try:
         from lambda_function.app import lambda_handler
         
+        # Drive the handler under load when more than one invocation is requested
+        if load_test:
+            run_load_test(lambda_handler, args.prompt, max(1, args.concurrency), max(1, args.iterations))
+            return
+        
         # Create a mock event
         event = create_mock_event(args.prompt)
         
         # Call the Lambda handler
-        logger.info(f"Calling Lambda handler with prompt: {args.prompt}")
+        logger.info("Calling Lambda handler with prompt: %s", args.prompt)
         response = lambda_handler(event, None)
         
         # Print the response
@@ -89,7 +140,7 @@ def main():
         print("-" * 80)
         
     except Exception as e:
-        logger.error(f"Error running the test: {str(e)}")
+        logger.error("Error running the test: %s", e)
         raise
 
 if __name__ == "__main__":
@@ -0,0 +1,153 @@
+import os
+import boto3
+import time
+import asyncio
+import random
+import functools
+import logging
+from botocore.config import Config
+from botocore.exceptions import ClientError
+from typing import Dict, Any
+
+# Setup logging
+logger = logging.getLogger(__name__)
+
+# AWS region for the Bedrock clients
+AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
+
+# Client configuration: adaptive retries, a connection pool large enough for
+# concurrent callers and TCP keep-alive so warm Lambdas reuse their sockets
+bedrock_config = Config(
+    retries={'max_attempts': 5, 'mode': 'adaptive'},
+    max_pool_connections=50,
+    tcp_keepalive=True,
+    read_timeout=30,
+    connect_timeout=3
+)
+
+# Backoff settings for Bedrock requests that still fail transiently after botocore's own retries
+MAX_RETRIES = 4
+RETRY_BASE_DELAY = 0.2
+RETRY_MAX_DELAY = 10.0
+
+# Error codes worth retrying; anything else (e.g. ValidationException) fails immediately
+RETRYABLE_ERROR_CODES = frozenset({
+    'ThrottlingException',
+    'ServiceUnavailableException',
+    'ModelNotReadyException',
+    'InternalServerException',
+})
+
+# aioboto3 session for the async variants, created on first use
+_async_session = None
+
+
+@functools.lru_cache(maxsize=1)
+def get_client():
+    """
+    Return the Bedrock runtime client shared by the embedding and generation utilities.
+    
+    Returns:
+        botocore.client.BaseClient: The Bedrock runtime client
+    """
+    client = boto3.client(
+        service_name='bedrock-runtime',
+        region_name=AWS_REGION,
+        config=bedrock_config
+    )
+    
+    # Ask the endpoint to keep the connection open between requests
+    client.meta.events.register(
+        'request-created.bedrock-runtime',
+        lambda request, **kwargs: request.headers.__setitem__('Connection', 'keep-alive')
+    )
+    
+    return client
+
+
+def get_async_session():
+    """
+    Return the shared aioboto3 session, importing aioboto3 only when an async variant is used.
+    
+    Returns:
+        aioboto3.Session: The aioboto3 session
+    """
+    global _async_session
+    if _async_session is None:
+        import aioboto3
+        _async_session = aioboto3.Session()
+    return _async_session
+
+
+def get_async_client():
+    """
+    Create an aioboto3 Bedrock runtime client, to be used as an async context manager.
+    
+    Returns:
+        The aioboto3 client context manager
+    """
+    return get_async_session().client('bedrock-runtime', region_name=AWS_REGION, config=bedrock_config)
+
+
+def _should_retry(error: ClientError, attempt: int) -> bool:
+    """
+    Check whether a failed Bedrock call hit a transient error and has retries left.
+    """
+    return (error.response.get('Error', {}).get('Code') in RETRYABLE_ERROR_CODES
+            and attempt < MAX_RETRIES)
+
+
+def _backoff_delay(attempt: int) -> float:
+    """
+    Compute an exponential backoff delay with full jitter.
+    """
+    return random.uniform(0, min(RETRY_MAX_DELAY, RETRY_BASE_DELAY * 2 ** attempt))
+
+
+def invoke_with_backoff(operation: str = 'invoke_model', **kwargs) -> Dict[str, Any]:
+    """
+    Call the Bedrock model, retrying transient failures with exponential backoff and full jitter.
+    
+    Args:
+        operation (str): The client method to call (invoke_model or invoke_model_with_response_stream)
+        **kwargs: Keyword arguments passed to the client method
+        
+    Returns:
+        Dict[str, Any]: The Bedrock response
+    """
+    method = getattr(get_client(), operation)
+    attempt = 0
+    while True:
+        try:
+            return method(**kwargs)
+        except ClientError as e:
+            if not _should_retry(e, attempt):
+                raise
+            delay = _backoff_delay(attempt)
+            logger.warning("Bedrock request failed (%s), retrying in %.2fs", e.response['Error']['Code'], delay)
+            time.sleep(delay)
+            attempt += 1
+
+
+async def invoke_with_backoff_async(client, **kwargs) -> Dict[str, Any]:
+    """
+    Async counterpart of invoke_with_backoff for an aioboto3 client.
+    
+    Args:
+        client: An open aioboto3 bedrock-runtime client
+        **kwargs: Keyword arguments passed to invoke_model
+        
+    Returns:
+        Dict[str, Any]: The Bedrock response
+    """
+    attempt = 0
+    while True:
+        try:
+            return await client.invoke_model(**kwargs)
+        except ClientError as e:
+            if not _should_retry(e, attempt):
+                raise
+            delay = _backoff_delay(attempt)
+            logger.warning("Bedrock request failed (%s), retrying in %.2fs", e.response['Error']['Code'], delay)
+            await asyncio.sleep(delay)
+            attempt += 1
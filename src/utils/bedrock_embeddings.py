@@ -1,21 +1,66 @@
 import os
-import boto3
-import json
+import orjson
+import asyncio
+import hashlib
 import logging
-from typing import List, Dict, Any
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils.bedrock_client import get_async_client, invoke_with_backoff, invoke_with_backoff_async
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Initialize the Bedrock client
-bedrock_runtime = boto3.client(
-    service_name='bedrock-runtime',
-    region_name=os.environ.get('AWS_REGION', 'us-east-1')
-)
-
 # The embedding model ID to use
 EMBEDDING_MODEL_ID = os.environ.get('EMBEDDING_MODEL_ID', 'amazon.titan-embed-text-v1')
 
+# Upper bound on concurrent embedding requests (must not exceed max_pool_connections)
+MAX_EMBEDDING_WORKERS = 16
+
+# Number of embeddings kept in the in-process LRU cache (0 disables caching)
+EMBEDDING_CACHE_SIZE = int(os.environ.get('EMBEDDING_CACHE_SIZE', 1024))
+
+# LRU cache of embeddings keyed by a digest of (model ID, text), shared by all threads
+_embedding_cache: "OrderedDict[str, Tuple[float, ...]]" = OrderedDict()
+_embedding_cache_lock = threading.Lock()
+
+
+def _cache_key(text: str) -> str:
+    """
+    Build a fixed-size cache key so long inputs don't inflate the cache.
+    """
+    digest = hashlib.blake2b(EMBEDDING_MODEL_ID.encode('utf-8'), digest_size=16)
+    digest.update(b'\0')
+    digest.update(text.encode('utf-8'))
+    return digest.hexdigest()
+
+
+def _get_cached_embedding(key: str) -> Optional[List[float]]:
+    """
+    Look up an embedding in the LRU cache, marking it as recently used.
+    """
+    with _embedding_cache_lock:
+        embedding = _embedding_cache.get(key)
+        if embedding is None:
+            return None
+        _embedding_cache.move_to_end(key)
+    return list(embedding)
+
+
+def _cache_embedding(key: str, embedding: List[float]) -> None:
+    """
+    Store an embedding in the LRU cache, evicting the least recently used entry when full.
+    """
+    if EMBEDDING_CACHE_SIZE <= 0 or not embedding:
+        return
+    with _embedding_cache_lock:
+        _embedding_cache[key] = tuple(embedding)
+        _embedding_cache.move_to_end(key)
+        while len(_embedding_cache) > EMBEDDING_CACHE_SIZE:
+            _embedding_cache.popitem(last=False)
+
 
 def create_embeddings(text: str) -> List[float]:
     """
@@ -28,7 +73,13 @@ def create_embeddings(text: str) -> List[float]:
         List[float]: The generated embedding vector
     """
     try:
-        logger.info(f"Creating embeddings with model: {EMBEDDING_MODEL_ID}")
+        # Serve repeated inputs from the cache without calling Bedrock
+        key = _cache_key(text)
+        cached = _get_cached_embedding(key)
+        if cached is not None:
+            return cached
+        
+        logger.info("Creating embeddings with model: %s", EMBEDDING_MODEL_ID)
         
         # Prepare the request body
         request_body = {
@@ -36,40 +87,134 @@ def create_embeddings(text: str) -> List[float]:
         }
         
         # Call the Bedrock embedding model
-        response = bedrock_runtime.invoke_model(
+        response = invoke_with_backoff(
             modelId=EMBEDDING_MODEL_ID,
-            body=json.dumps(request_body)
+            body=orjson.dumps(request_body)
         )
         
         # Parse the response
-        response_body = json.loads(response['body'].read().decode('utf-8'))
+        response_body = orjson.loads(response['body'].read())
         
         # Extract embeddings from the response
         embeddings = response_body.get('embedding', [])
+        _cache_embedding(key, embeddings)
         
-        logger.info(f"Successfully generated embeddings with dimension: {len(embeddings)}")
+        logger.info("Successfully generated embeddings with dimension: %s", len(embeddings))
         return embeddings
     
     except Exception as e:
-        logger.error(f"Error generating embeddings: {str(e)}")
+        logger.error("Error generating embeddings: %s", e)
         # Return empty list on error, which will be handled by the calling function
         return []
 
 
 def batch_create_embeddings(texts: List[str]) -> List[List[float]]:
     """
-    Generate embeddings for multiple texts.
+    Generate embeddings for multiple texts concurrently.
     
     Args:
         texts (List[str]): List of input texts to generate embeddings for
         
     Returns:
-        List[List[float]]: List of embedding vectors
+        List[List[float]]: List of embedding vectors, in the same order as the input texts
     """
-    embeddings = []
+    if not texts:
+        return []
+    
+    max_workers = min(len(texts), MAX_EMBEDDING_WORKERS)
     
-    for text in texts:
-        embedding = create_embeddings(text)
-        embeddings.append(embedding)
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        embeddings = list(executor.map(create_embeddings, texts))
     
     return embeddings
+
+
+async def _create_embeddings_with_client(client, text: str) -> List[float]:
+    """
+    Generate embeddings for the input text using an open aioboto3 client.
+    
+    Args:
+        client: An open aioboto3 bedrock-runtime client
+        text (str): The input text to generate embeddings for
+        
+    Returns:
+        List[float]: The generated embedding vector
+    """
+    try:
+        # Serve repeated inputs from the cache without calling Bedrock
+        key = _cache_key(text)
+        cached = _get_cached_embedding(key)
+        if cached is not None:
+            return cached
+        
+        logger.info("Creating embeddings with model: %s", EMBEDDING_MODEL_ID)
+        
+        # Call the Bedrock embedding model
+        response = await invoke_with_backoff_async(
+            client,
+            modelId=EMBEDDING_MODEL_ID,
+            body=orjson.dumps({"inputText": text})
+        )
+        
+        # Parse the response
+        response_body = orjson.loads(await response['body'].read())
+        
+        # Extract embeddings from the response
+        embeddings = response_body.get('embedding', [])
+        _cache_embedding(key, embeddings)
+        
+        logger.info("Successfully generated embeddings with dimension: %s", len(embeddings))
+        return embeddings
+    
+    except Exception as e:
+        logger.error("Error generating embeddings: %s", e)
+        return []
+
+
+async def create_embeddings_async(text: str) -> List[float]:
+    """
+    Generate embeddings for the input text without blocking the event loop.
+    
+    Args:
+        text (str): The input text to generate embeddings for
+        
+    Returns:
+        List[float]: The generated embedding vector
+    """
+    async with get_async_client() as client:
+        return await _create_embeddings_with_client(client, text)
+
+
+async def batch_create_embeddings_async(texts: List[str], client=None,
+                                        semaphore: Optional[asyncio.Semaphore] = None) -> List[List[float]]:
+    """
+    Generate embeddings for multiple texts concurrently on the event loop.
+    
+    Callers running several batches at once should pass a shared client and
+    semaphore, so the total number of requests in flight stays bounded.
+    
+    Args:
+        texts (List[str]): List of input texts to generate embeddings for
+        client: An open aioboto3 bedrock-runtime client; one is opened if omitted
+        semaphore (Optional[asyncio.Semaphore]): Limits concurrent requests; defaults
+            to a new one allowing MAX_EMBEDDING_WORKERS
+        
+    Returns:
+        List[List[float]]: List of embedding vectors, in the same order as the input texts
+    """
+    if not texts:
+        return []
+    
+    # Bound the number of requests in flight, as the threaded variant does
+    if semaphore is None:
+        semaphore = asyncio.Semaphore(MAX_EMBEDDING_WORKERS)
+    
+    if client is None:
+        async with get_async_client() as client:
+            return await batch_create_embeddings_async(texts, client, semaphore)
+    
+    async def embed(text: str) -> List[float]:
+        async with semaphore:
+            return await _create_embeddings_with_client(client, text)
+    
+    return list(await asyncio.gather(*(embed(text) for text in texts)))
@@ -1,21 +1,156 @@
 import os
-import boto3
-import json
+import orjson
 import logging
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Iterator, Optional, Tuple
+
+from utils.bedrock_client import get_async_client, invoke_with_backoff, invoke_with_backoff_async
 
 # Setup logging
 logger = logging.getLogger(__name__)
 
-# Initialize the Bedrock client
-bedrock_runtime = boto3.client(
-    service_name='bedrock-runtime',
-    region_name=os.environ.get('AWS_REGION', 'us-east-1')
-)
-
 # The generative model ID to use
 GENERATION_MODEL_ID = os.environ.get('GENERATION_MODEL_ID', 'anthropic.claude-3-sonnet-20240229-v1:0')
 
+# Request fields that are the same on every call
+CLAUDE_API_VERSION = "bedrock-2023-05-31"
+DEFAULT_TOP_P = 0.9
+
+
+def _build_claude(prompt: str, max_tokens: int, temperature: float) -> Dict[str, Any]:
+    """Anthropic Claude models use the messages format."""
+    return {
+        "anthropic_version": CLAUDE_API_VERSION,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+        "messages": [
+            {
+                "role": "user",
+                "content": [
+                    {
+                        "type": "text",
+                        "text": prompt
+                    }
+                ]
+            }
+        ]
+    }
+
+
+def _parse_claude(response_body: Dict[str, Any]) -> str:
+    return response_body.get('content', [{}])[0].get('text', '')
+
+
+def _parse_claude_chunk(chunk: Dict[str, Any]) -> str:
+    # Only content_block_delta events carry text; message_start/stop etc. are skipped
+    if chunk.get('type') == 'content_block_delta':
+        return chunk.get('delta', {}).get('text', '')
+    return ''
+
+
+def _build_titan(prompt: str, max_tokens: int, temperature: float) -> Dict[str, Any]:
+    """Amazon Titan models use a different format."""
+    return {
+        "inputText": prompt,
+        "textGenerationConfig": {
+            "maxTokenCount": max_tokens,
+            "temperature": temperature,
+            "topP": DEFAULT_TOP_P
+        }
+    }
+
+
+def _parse_titan(response_body: Dict[str, Any]) -> str:
+    return response_body.get('results', [{}])[0].get('outputText', '')
+
+
+def _parse_titan_chunk(chunk: Dict[str, Any]) -> str:
+    return chunk.get('outputText', '')
+
+
+def _build_ai21(prompt: str, max_tokens: int, temperature: float) -> Dict[str, Any]:
+    """AI21 Jurassic models use yet another format."""
+    return {
+        "prompt": prompt,
+        "maxTokens": max_tokens,
+        "temperature": temperature,
+        "topP": DEFAULT_TOP_P,
+    }
+
+
+def _parse_ai21(response_body: Dict[str, Any]) -> str:
+    return response_body.get('completions', [{}])[0].get('data', {}).get('text', '')
+
+
+def _build_cohere(prompt: str, max_tokens: int, temperature: float) -> Dict[str, Any]:
+    """Cohere models format."""
+    return {
+        "prompt": prompt,
+        "max_tokens": max_tokens,
+        "temperature": temperature,
+    }
+
+
+def _parse_cohere(response_body: Dict[str, Any]) -> str:
+    return response_body.get('generations', [{}])[0].get('text', '')
+
+
+def _parse_cohere_chunk(chunk: Dict[str, Any]) -> str:
+    return chunk.get('text', '')
+
+
+def _build_llama(prompt: str, max_tokens: int, temperature: float) -> Dict[str, Any]:
+    """Meta Llama models format."""
+    return {
+        "prompt": prompt,
+        "max_gen_len": max_tokens,
+        "temperature": temperature,
+    }
+
+
+def _parse_llama(response_body: Dict[str, Any]) -> str:
+    return response_body.get('generation', '')
+
+
+def _parse_llama_chunk(chunk: Dict[str, Any]) -> str:
+    return chunk.get('generation', '')
+
+
+# Request builder, response parser and streaming chunk parser per model family,
+# keyed by model ID prefix (AI21 Jurassic models do not support streaming)
+MODEL_ADAPTERS = (
+    ('anthropic.claude', _build_claude, _parse_claude, _parse_claude_chunk),
+    ('amazon.titan', _build_titan, _parse_titan, _parse_titan_chunk),
+    ('ai21', _build_ai21, _parse_ai21, None),
+    ('cohere', _build_cohere, _parse_cohere, _parse_cohere_chunk),
+    ('meta.llama', _build_llama, _parse_llama, _parse_llama_chunk),
+)
+
+# The model ID never changes at runtime, so pick its adapter once at import
+_build_request_body, _parse_response, _parse_stream_chunk = next(
+    ((build, parse, parse_chunk) for prefix, build, parse, parse_chunk in MODEL_ADAPTERS
+     if GENERATION_MODEL_ID.startswith(prefix)),
+    (None, None, None)
+)
+
+
+def _get_adapter(streaming: bool = False) -> Tuple[Callable, Callable]:
+    """
+    Return the request builder and response (or chunk) parser for the configured model.
+    
+    Args:
+        streaming (bool): Whether to return the streaming chunk parser
+        
+    Returns:
+        Tuple[Callable, Callable]: The request builder and parser
+    """
+    if _build_request_body is None:
+        raise ValueError(f"Unsupported model: {GENERATION_MODEL_ID}")
+    if streaming:
+        if _parse_stream_chunk is None:
+            raise ValueError(f"Streaming is not supported for model: {GENERATION_MODEL_ID}")
+        return _build_request_body, _parse_stream_chunk
+    return _build_request_body, _parse_response
+
 
 def generate_response(prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> str:
     """
@@ -30,87 +165,104 @@ def generate_response(prompt: str, max_tokens: int = 1000, temperature: float =
         str: The generated text response
     """
     try:
-        logger.info(f"Generating response with model: {GENERATION_MODEL_ID}")
-        
-        # Anthropic Claude models use a specific format
-        if GENERATION_MODEL_ID.startswith('anthropic.claude'):
-            request_body = {
-                "anthropic_version": "bedrock-2023-05-31",
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-                "messages": [
-                    {
-                        "role": "user",
-                        "content": [
-                            {
-                                "type": "text",
-                                "text": prompt
-                            }
-                        ]
-                    }
-                ]
-            }
-        # Amazon Titan models use a different format
-        elif GENERATION_MODEL_ID.startswith('amazon.titan'):
-            request_body = {
-                "inputText": prompt,
-                "textGenerationConfig": {
-                    "maxTokenCount": max_tokens,
-                    "temperature": temperature,
-                    "topP": 0.9
-                }
-            }
-        # AI21 Jurassic models use yet another format
-        elif GENERATION_MODEL_ID.startswith('ai21'):
-            request_body = {
-                "prompt": prompt,
-                "maxTokens": max_tokens,
-                "temperature": temperature,
-                "topP": 0.9,
-            }
-        # Cohere models format
-        elif GENERATION_MODEL_ID.startswith('cohere'):
-            request_body = {
-                "prompt": prompt,
-                "max_tokens": max_tokens,
-                "temperature": temperature,
-            }
-        # Meta Llama models format
-        elif GENERATION_MODEL_ID.startswith('meta.llama'):
-            request_body = {
-                "prompt": prompt,
-                "max_gen_len": max_tokens,
-                "temperature": temperature,
-            }
-        else:
-            raise ValueError(f"Unsupported model: {GENERATION_MODEL_ID}")
+        logger.info("Generating response with model: %s", GENERATION_MODEL_ID)
+        
+        build_request, parse_response = _get_adapter()
+        request_body = build_request(prompt, max_tokens, temperature)
         
         # Call the Bedrock generative model
-        response = bedrock_runtime.invoke_model(
+        response = invoke_with_backoff(
             modelId=GENERATION_MODEL_ID,
-            body=json.dumps(request_body)
+            body=orjson.dumps(request_body)
         )
         
         # Parse the response
-        response_body = json.loads(response['body'].read().decode('utf-8'))
+        response_body = orjson.loads(response['body'].read())
         
         # Extract the generated text from the response based on model type
-        if GENERATION_MODEL_ID.startswith('anthropic.claude'):
-            generated_text = response_body.get('content', [{}])[0].get('text', '')
-        elif GENERATION_MODEL_ID.startswith('amazon.titan'):
-            generated_text = response_body.get('results', [{}])[0].get('outputText', '')
-        elif GENERATION_MODEL_ID.startswith('ai21'):
-            generated_text = response_body.get('completions', [{}])[0].get('data', {}).get('text', '')
-        elif GENERATION_MODEL_ID.startswith('cohere'):
-            generated_text = response_body.get('generations', [{}])[0].get('text', '')
-        elif GENERATION_MODEL_ID.startswith('meta.llama'):
-            generated_text = response_body.get('generation', '')
-        else:
-            generated_text = "Unable to parse response from unsupported model"
+        generated_text = parse_response(response_body)
+        
+        logger.info("Successfully generated response")
+        return generated_text
+    
+    except Exception as e:
+        logger.error("Error generating text response: %s", e)
+        return f"Error generating response: {str(e)}"
+
+
+def generate_response_stream(prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> Iterator[str]:
+    """
+    Generate text response using Amazon Bedrock, yielding text as soon as the model produces it.
+    
+    Args:
+        prompt (str): The input prompt to generate a response for
+        max_tokens (int): Maximum number of tokens to generate
+        temperature (float): Temperature for generation (0.0-1.0)
+        
+    Yields:
+        str: Successive pieces of the generated text response
+    """
+    try:
+        logger.info("Streaming response with model: %s", GENERATION_MODEL_ID)
+        
+        build_request, parse_chunk = _get_adapter(streaming=True)
+        request_body = build_request(prompt, max_tokens, temperature)
+        
+        # Call the Bedrock generative model with a streamed response
+        response = invoke_with_backoff(
+            'invoke_model_with_response_stream',
+            modelId=GENERATION_MODEL_ID,
+            body=orjson.dumps(request_body)
+        )
+        
+        # Each event carries one JSON-encoded chunk of the completion
+        for event in response['body']:
+            chunk = event.get('chunk')
+            if not chunk:
+                continue
+            text = parse_chunk(orjson.loads(chunk['bytes']))
+            if text:
+                yield text
+        
+        logger.info("Successfully streamed response")
+    
+    except Exception as e:
+        logger.error("Error streaming text response: %s", e)
+        yield f"Error generating response: {str(e)}"
+
+
+async def generate_response_async(prompt: str, max_tokens: int = 1000, temperature: float = 0.7) -> str:
+    """
+    Generate text response using Amazon Bedrock without blocking the event loop.
+    
+    Args:
+        prompt (str): The input prompt to generate a response for
+        max_tokens (int): Maximum number of tokens to generate
+        temperature (float): Temperature for generation (0.0-1.0)
+        
+    Returns:
+        str: The generated text response
+    """
+    try:
+        logger.info("Generating response with model: %s", GENERATION_MODEL_ID)
+        
+        build_request, parse_response = _get_adapter()
+        request_body = build_request(prompt, max_tokens, temperature)
+        
+        # Call the Bedrock generative model
+        async with get_async_client() as client:
+            response = await invoke_with_backoff_async(
+                client,
+                modelId=GENERATION_MODEL_ID,
+                body=orjson.dumps(request_body)
+            )
+            response_body = orjson.loads(await response['body'].read())
+        
+        generated_text = parse_response(response_body)
         
         logger.info("Successfully generated response")
         return generated_text
     
     except Exception as e:
-        logger.error(f"Error generating text response: {str(e)}")
+        logger.error("Error generating text response: %s", e)
         return f"Error generating response: {str(e)}"
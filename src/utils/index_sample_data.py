@@ -1,20 +1,37 @@
 import os
 import sys
-import json
+import asyncio
 import logging
 import argparse
-from typing import List, Dict, Any
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain, islice
+from typing import List, Dict, Any, Iterable, Iterator, Optional, Tuple
+import ijson
+import orjson
 
 # Add parent directory to path for imports
 sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
-from utils.bedrock_embeddings import create_embeddings, batch_create_embeddings
-from utils.opensearch_client import index_document, batch_index_documents
+from utils.bedrock_client import get_async_client
+from utils.bedrock_embeddings import (
+    MAX_EMBEDDING_WORKERS, create_embeddings, batch_create_embeddings, batch_create_embeddings_async
+)
+from utils.opensearch_client import (
+    AUTOTUNE_SAMPLE_DOCS, OPENSEARCH_BULK_CHUNK_SIZE, OPENSEARCH_INDEX, OPENSEARCH_INDEX_THREADS,
+    batch_index_documents, bulk_ingest_context, get_opensearch_client, get_tuned_chunk_size, index_document
+)
 
 # Setup logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger(__name__)
 
+# Default number of batches whose embeddings are requested ahead of indexing
+MAX_IN_FLIGHT_EMBED_BATCHES = 4
+
+# Upper bound on autotuned batches; up to two batches of embeddings are held at once
+# while the next one is prefetched
+MAX_AUTOTUNED_BATCH_SIZE = 2000
+
 
 def load_sample_data(file_path: str) -> List[Dict[str, Any]]:
     """
@@ -27,50 +44,242 @@ def load_sample_data(file_path: str) -> List[Dict[str, Any]]:
         List[Dict[str, Any]]: List of sample documents
     """
     try:
-        with open(file_path, 'r', encoding='utf-8') as f:
-            data = json.load(f)
+        with open(file_path, 'rb') as f:
+            data = orjson.loads(f.read())
         
-        logger.info(f"Successfully loaded {len(data)} documents from {file_path}")
+        logger.info("Successfully loaded %s documents from %s", len(data), file_path)
         return data
     
     except Exception as e:
-        logger.error(f"Error loading sample data: {str(e)}")
+        logger.error("Error loading sample data: %s", e)
         return []
 
 
-def index_data(documents: List[Dict[str, Any]], batch_size: int = 10) -> None:
+def load_sample_data_jsonl(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream sample documents from a JSON Lines file, one document per line.
+    
+    Args:
+        file_path (str): Path to the JSON Lines file
+        
+    Yields:
+        Dict[str, Any]: The next sample document
+    """
+    with open(file_path, 'rb') as f:
+        for line in f:
+            if line.strip():
+                yield orjson.loads(line)
+
+
+def iter_sample_data(file_path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Stream sample documents from a file one at a time.
+    
+    Files ending in .jsonl are read as JSON Lines; anything else is parsed
+    incrementally as a JSON array. Unlike load_sample_data, only the document
+    being yielded is held in memory, so multi-GB corpora can be indexed with
+    constant memory.
+    
+    Args:
+        file_path (str): Path to the JSON or JSON Lines file
+        
+    Yields:
+        Dict[str, Any]: The next sample document
+    """
+    if file_path.endswith('.jsonl'):
+        yield from load_sample_data_jsonl(file_path)
+        return
+    
+    with open(file_path, 'rb') as f:
+        # Parse non-integer numbers as floats rather than Decimal
+        yield from ijson.items(f, 'item', use_float=True)
+
+
+def _peek_documents(documents: Iterable[Dict[str, Any]]) -> Optional[Iterator[Dict[str, Any]]]:
+    """
+    Check whether there is anything to index without losing the first document.
+    
+    Args:
+        documents (Iterable[Dict[str, Any]]): Documents to index
+        
+    Returns:
+        Optional[Iterator[Dict[str, Any]]]: An iterator over all the documents, or
+            None if there are none
+    """
+    documents = iter(documents)
+    first = next(documents, None)
+    if first is None:
+        return None
+    return chain([first], documents)
+
+
+def _resolve_batch_sizes(client, documents: Iterator[Dict[str, Any]],
+                         batch_size: int) -> Tuple[Iterator[Dict[str, Any]], int, int]:
+    """
+    Work out the batch size and bulk chunk size, autotuning when batch_size is 0.
+    
+    Args:
+        client (OpenSearch): The OpenSearch client
+        documents (Iterator[Dict[str, Any]]): Documents to index
+        batch_size (int): Requested batch size, or 0 to autotune
+        
+    Returns:
+        Tuple[Iterator[Dict[str, Any]], int, int]: The documents (with any sampled ones
+            put back), the batch size and the bulk chunk size
+    """
+    if batch_size > 0:
+        return documents, batch_size, OPENSEARCH_BULK_CHUNK_SIZE
+    
+    # Probe the best bulk chunk size on the leading documents, then put them back;
+    # a batch gives each indexing thread one chunk, within the memory bound
+    sample = list(islice(documents, AUTOTUNE_SAMPLE_DOCS))
+    chunk_size = get_tuned_chunk_size(client, sample)
+    batch_size = max(chunk_size, min(chunk_size * OPENSEARCH_INDEX_THREADS, MAX_AUTOTUNED_BATCH_SIZE))
+    return chain(sample, documents), batch_size, chunk_size
+
+
+def index_data(documents: Iterable[Dict[str, Any]], batch_size: int = 10) -> None:
     """
     Index sample data into OpenSearch.
     
+    Documents are consumed lazily, so a generator such as iter_sample_data can be
+    passed in to index a large file without loading it first. Embeddings for the
+    next batch are requested on a background thread while the current batch is
+    being indexed.
+    
+    A batch_size of 0 autotunes the bulk chunk size against the cluster (see
+    get_tuned_chunk_size) and sizes each batch to give every indexing thread a chunk,
+    up to MAX_AUTOTUNED_BATCH_SIZE documents.
+    
+    Args:
+        documents (Iterable[Dict[str, Any]]): Documents to index
+        batch_size (int): Number of documents to index in each batch, or 0 to autotune
+    """
+    try:
+        logger.info("Starting indexing")
+        
+        # Leave the index settings alone when there is nothing to load
+        documents = _peek_documents(documents)
+        if documents is None:
+            logger.error("No documents to index")
+            return
+        
+        client = get_opensearch_client()
+        documents, batch_size, chunk_size = _resolve_batch_sizes(client, documents, batch_size)
+        batches = iter(lambda: list(islice(documents, batch_size)), [])
+        total_docs = 0
+        batch_number = 0
+        
+        def embed(batch: List[Dict[str, Any]]) -> List[List[float]]:
+            return batch_create_embeddings([doc.get("content", "") for doc in batch])
+        
+        # Process documents in batches, with the index tuned for bulk loading
+        with bulk_ingest_context(client, OPENSEARCH_INDEX), ThreadPoolExecutor(max_workers=1) as prefetcher:
+            batch = next(batches, None)
+            future = prefetcher.submit(embed, batch) if batch else None
+            while batch:
+                batch_number += 1
+                total_docs += len(batch)
+                logger.info("Processing batch %s with %s documents", batch_number, len(batch))
+                
+                # Wait for this batch's embeddings and start on the next batch's
+                embeddings = future.result()
+                next_batch = next(batches, None)
+                if next_batch:
+                    future = prefetcher.submit(embed, next_batch)
+                
+                # Index the batch while the next embeddings are being created
+                success = batch_index_documents(batch, embeddings, chunk_size=chunk_size)
+                
+                if success:
+                    logger.info("Successfully indexed batch %s", batch_number)
+                else:
+                    logger.warning("Failed to index batch %s", batch_number)
+                batch = next_batch
+        
+        logger.info("Indexing complete for %s documents", total_docs)
+    
+    except Exception as e:
+        logger.error("Error indexing data: %s", e)
+
+
+async def index_data_async(documents: Iterable[Dict[str, Any]], batch_size: int = 10,
+                           max_in_flight_embed_batches: int = MAX_IN_FLIGHT_EMBED_BATCHES) -> None:
+    """
+    Index sample data into OpenSearch, overlapping embedding with indexing.
+    
+    A producer requests embeddings for up to max_in_flight_embed_batches batches
+    ahead, while a consumer indexes finished batches in order on a worker thread,
+    so Bedrock and OpenSearch latency are hidden behind each other. All batches
+    share one Bedrock client and at most MAX_EMBEDDING_WORKERS requests in flight.
+    
     Args:
-        documents (List[Dict[str, Any]]): List of documents to index
-        batch_size (int): Number of documents to index in each batch
+        documents (Iterable[Dict[str, Any]]): Documents to index
+        batch_size (int): Number of documents to index in each batch, or 0 to autotune
+        max_in_flight_embed_batches (int): Batches embedded ahead of indexing
     """
     try:
-        total_docs = len(documents)
-        logger.info(f"Starting indexing of {total_docs} documents")
-        
-        # Process documents in batches
-        for i in range(0, total_docs, batch_size):
-            batch = documents[i:i+batch_size]
-            logger.info(f"Processing batch {i//batch_size + 1}/{(total_docs-1)//batch_size + 1} with {len(batch)} documents")
-            
-            # Create embeddings for the batch
+        logger.info("Starting pipelined indexing")
+        
+        # Leave the index settings alone when there is nothing to load
+        documents = _peek_documents(documents)
+        if documents is None:
+            logger.error("No documents to index")
+            return
+        
+        client = get_opensearch_client()
+        documents, batch_size, chunk_size = _resolve_batch_sizes(client, documents, batch_size)
+        queue: asyncio.Queue = asyncio.Queue()
+        batch_slots = asyncio.Semaphore(max(1, max_in_flight_embed_batches))
+        request_slots = asyncio.Semaphore(MAX_EMBEDDING_WORKERS)
+        total_docs = 0
+        
+        async def embed(bedrock, batch: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[List[float]]]:
             contents = [doc.get("content", "") for doc in batch]
-            embeddings = batch_create_embeddings(contents)
-            
-            # Index the batch
-            success = batch_index_documents(batch, embeddings)
-            
-            if success:
-                logger.info(f"Successfully indexed batch {i//batch_size + 1}")
-            else:
-                logger.warning(f"Failed to index batch {i//batch_size + 1}")
-        
-        logger.info(f"Indexing complete for {total_docs} documents")
+            return batch, await batch_create_embeddings_async(contents, bedrock, request_slots)
+        
+        async def produce(bedrock) -> None:
+            # Queue embedding tasks in batch order once a batch slot is free; None marks
+            # the end of the input
+            while True:
+                batch = list(islice(documents, batch_size))
+                if not batch:
+                    break
+                await batch_slots.acquire()
+                await queue.put(asyncio.create_task(embed(bedrock, batch)))
+            await queue.put(None)
+        
+        async def consume() -> None:
+            nonlocal total_docs
+            batch_number = 0
+            while True:
+                task = await queue.get()
+                if task is None:
+                    break
+                batch, embeddings = await task
+                batch_slots.release()
+                batch_number += 1
+                total_docs += len(batch)
+                logger.info("Indexing batch %s with %s documents", batch_number, len(batch))
+                
+                # Index on a worker thread so the next embeddings keep arriving
+                success = await asyncio.to_thread(batch_index_documents, batch, embeddings,
+                                                  chunk_size=chunk_size)
+                
+                if success:
+                    logger.info("Successfully indexed batch %s", batch_number)
+                else:
+                    logger.warning("Failed to index batch %s", batch_number)
+        
+        # Run the pipeline with the index tuned for bulk loading
+        with bulk_ingest_context(client, OPENSEARCH_INDEX):
+            async with get_async_client() as bedrock:
+                await asyncio.gather(produce(bedrock), consume())
+        
+        logger.info("Indexing complete for %s documents", total_docs)
     
     except Exception as e:
-        logger.error(f"Error indexing data: {str(e)}")
+        logger.error("Error indexing data: %s", e)
 
 
 def create_sample_data() -> List[Dict[str, Any]]:
@@ -109,22 +318,47 @@ def create_sample_data() -> List[Dict[str, Any]]:
     ]
 
 
+def save_sample_data_jsonl(documents: Iterable[Dict[str, Any]], file_path: str) -> None:
+    """
+    Save sample data to a JSON Lines file, one document per line.
+    
+    Args:
+        documents (Iterable[Dict[str, Any]]): Documents to save
+        file_path (str): Path to save the JSON Lines file
+    """
+    try:
+        count = 0
+        with open(file_path, 'wb') as f:
+            for document in documents:
+                f.write(orjson.dumps(document, option=orjson.OPT_APPEND_NEWLINE))
+                count += 1
+        
+        logger.info("Successfully saved %s documents to %s", count, file_path)
+    
+    except Exception as e:
+        logger.error("Error saving sample data: %s", e)
+
+
 def save_sample_data(documents: List[Dict[str, Any]], file_path: str) -> None:
     """
-    Save sample data to a JSON file.
+    Save sample data to a JSON file, or to JSON Lines if the path ends in .jsonl.
     
     Args:
         documents (List[Dict[str, Any]]): List of documents to save
-        file_path (str): Path to save the JSON file
+        file_path (str): Path to save the JSON or JSON Lines file
     """
+    if file_path.endswith('.jsonl'):
+        save_sample_data_jsonl(documents, file_path)
+        return
+    
     try:
-        with open(file_path, 'w', encoding='utf-8') as f:
-            json.dump(documents, f, indent=2)
+        with open(file_path, 'wb') as f:
+            f.write(orjson.dumps(documents, option=orjson.OPT_INDENT_2))
         
-        logger.info(f"Successfully saved {len(documents)} documents to {file_path}")
+        logger.info("Successfully saved %s documents to %s", len(documents), file_path)
     
     except Exception as e:
-        logger.error(f"Error saving sample data: {str(e)}")
+        logger.error("Error saving sample data: %s", e)
 
 
 def main():
@@ -132,10 +366,13 @@ def main():
     Main function to run the sample data indexing utility.
     """
     parser = argparse.ArgumentParser(description='Index sample data into OpenSearch')
-    parser.add_argument('--file', '-f', type=str, help='Path to sample data JSON file')
+    parser.add_argument('--file', '-f', type=str, help='Path to sample data JSON or JSON Lines (.jsonl) file')
     parser.add_argument('--create', '-c', action='store_true', help='Create and save sample data')
-    parser.add_argument('--output', '-o', type=str, default='sample_data.json', help='Output file for created sample data')
-    parser.add_argument('--batch-size', '-b', type=int, default=10, help='Batch size for indexing')
+    parser.add_argument('--output', '-o', type=str, default='sample_data.json', help='Output file for created sample data (.jsonl for JSON Lines)')
+    parser.add_argument('--batch-size', '-b', type=int, default=10, help='Batch size for indexing (0 to autotune against the cluster)')
+    parser.add_argument('--pipeline', action='store_true', help='Overlap embedding and indexing with an asyncio pipeline')
+    parser.add_argument('--max-in-flight-embed-batches', type=int, default=MAX_IN_FLIGHT_EMBED_BATCHES,
+                        help='Batches embedded ahead of indexing when --pipeline is set')
     
     args = parser.parse_args()
     
@@ -148,10 +385,10 @@ def main():
         # Use the created data for indexing
         documents = sample_data
     
-    # Load sample data from file if provided
+    # Stream sample data from file if provided
     elif args.file:
-        logger.info(f"Loading sample data from {args.file}")
-        documents = load_sample_data(args.file)
+        logger.info("Streaming sample data from %s", args.file)
+        documents = iter_sample_data(args.file)
     
     # Otherwise, use the default sample data
     else:
@@ -159,10 +396,10 @@ def main():
         documents = create_sample_data()
     
     # Index the documents
-    if documents:
-        index_data(documents, args.batch_size)
+    if args.pipeline:
+        asyncio.run(index_data_async(documents, args.batch_size, args.max_in_flight_embed_batches))
     else:
-        logger.error("No documents to index")
+        index_data(documents, args.batch_size)
 
 
 if __name__ == "__main__":
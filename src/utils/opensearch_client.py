@@ -1,10 +1,24 @@
 import os
-import json
+import math
+import time
+import uuid
+import functools
 import logging
-from typing import List, Dict, Any, Optional
-from opensearchpy import OpenSearch, RequestsHttpConnection, AWSHTTP
-from opensearchpy.helpers import bulk
+import threading
+from contextlib import contextmanager
+from itertools import islice
+from typing import TYPE_CHECKING, List, Dict, Any, Iterable, Iterator, Optional, Set, Union
+from opensearchpy import OpenSearch, RequestsHttpConnection, AWSV4SignerAuth
+from opensearchpy.exceptions import SerializationError
+from opensearchpy.helpers import bulk, parallel_bulk
+from opensearchpy.serializer import JSONSerializer
 import boto3
+import orjson
+
+# numpy is only needed for batch indexing, so it is imported there rather than on
+# the query path (and the Lambda cold start)
+if TYPE_CHECKING:
+    import numpy as np
 
 # Setup logging
 logger = logging.getLogger(__name__)
@@ -18,13 +32,134 @@ OPENSEARCH_VERIFY_CERTS = os.environ.get('OPENSEARCH_VERIFY_CERTS', 'True').lowe
 USE_AWS_AUTH = os.environ.get('USE_AWS_AUTH', 'True').lower() == 'true'
 AWS_REGION = os.environ.get('AWS_REGION', 'us-east-1')
 
+# Gzip request bodies; embeddings serialize to long runs of decimal digits, so bulk
+# payloads typically shrink several times over on the wire
+OPENSEARCH_HTTP_COMPRESS = os.environ.get('OPENSEARCH_HTTP_COMPRESS', 'False').lower() == 'true'
+
 # Number of results to return from the vector search
 MAX_SEARCH_RESULTS = int(os.environ.get('MAX_SEARCH_RESULTS', 3))
 
+# Dimension of the stored embedding vectors; adjust based on your embedding model
+EMBEDDING_DIMENSION = 1536
+
+# Invariant: every stored and query vector is L2-normalized before it reaches
+# OpenSearch, so the index can rank by inner product (equal to cosine similarity on
+# unit vectors) and skip the two vector norms cosinesimil computes per distance
+VECTOR_SPACE_TYPE = "innerproduct"
+
+# HNSW graph construction: links per node and candidate list size while building.
+# Higher values raise recall at the cost of ingest time and memory.
+HNSW_M = int(os.environ.get('HNSW_M', 16))
+HNSW_EF_CONSTRUCTION = int(os.environ.get('HNSW_EF_CONSTRUCTION', 256))
+
+# Candidate list size at query time; unset uses the engine default. Can be raised
+# to trade latency for recall without reindexing.
+HNSW_EF_SEARCH = int(os.environ['HNSW_EF_SEARCH']) if os.environ.get('HNSW_EF_SEARCH') else None
+
+# Vector compression for the faiss HNSW graph: "fp16" (scalar quantization to 16-bit
+# floats, half the memory of fp32) or "none". Only applied when the index is created.
+OPENSEARCH_VECTOR_QUANT = os.environ.get('OPENSEARCH_VECTOR_QUANT', 'fp16').lower()
+
+# Bulk indexing settings: worker threads, documents per bulk request, bytes per bulk
+# request (10 MiB is the HTTP payload limit of the smaller OpenSearch Service instance
+# types) and the number of chunks queued ahead of the workers
+OPENSEARCH_INDEX_THREADS = int(os.environ.get('OPENSEARCH_INDEX_THREADS', 8))
+OPENSEARCH_BULK_CHUNK_SIZE = int(os.environ.get('OPENSEARCH_BULK_CHUNK_SIZE', 500))
+OPENSEARCH_BULK_MAX_CHUNK_BYTES = int(os.environ.get('OPENSEARCH_BULK_MAX_CHUNK_BYTES', 10 * 1024 * 1024))
+OPENSEARCH_BULK_QUEUE_SIZE = int(os.environ.get('OPENSEARCH_BULK_QUEUE_SIZE', 4))
+
+# Number of leading documents used to estimate the average serialized document size
+BULK_SIZE_SAMPLE_DOCS = 20
+
+# Index settings applied while bulk loading: no periodic refresh, no replicas to keep
+# in sync and fewer translog flushes (restored when the load finishes)
+BULK_INGEST_SETTINGS = {
+    "refresh_interval": "-1",
+    "number_of_replicas": 0,
+    "translog.flush_threshold_size": "1gb"
+}
+
+# Timeout in seconds for the force merge that follows a bulk load
+FORCEMERGE_TIMEOUT = 600
+
+# Bulk chunk sizes probed by autotune_chunk_size, the number of sample documents
+# it draws on, and where the winning size is cached per endpoint and index
+AUTOTUNE_CANDIDATES = (100, 300, 1000, 3000)
+AUTOTUNE_SAMPLE_DOCS = 3000
+AUTOTUNE_CACHE_PATH = os.path.expanduser('~/.cache/rag_bulk_size')
+
+# Shared OpenSearch client, created on first use so connections are reused across requests
+_client: Optional[OpenSearch] = None
+_client_lock = threading.Lock()
+
+# Indices known to exist, so the existence check only runs once per process
+_index_ready: Set[str] = set()
+_index_lock = threading.Lock()
+
+
+# orjson options matching the stock client: numpy arrays, and non-string dict keys
+# (which the stdlib json module converts to strings)
+ORJSON_OPTIONS = orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+
+class OrjsonSerializer(JSONSerializer):
+    """
+    Request and response serializer for the OpenSearch client backed by orjson,
+    which is several times faster than the stdlib json module on bodies made up
+    of long float arrays such as embeddings, and also accepts numpy arrays.
+    """
+    
+    def loads(self, s: Union[str, bytes]) -> Any:
+        try:
+            return orjson.loads(s)
+        except orjson.JSONDecodeError as e:
+            raise SerializationError(s, e)
+    
+    def dumps(self, data: Any) -> str:
+        # Bodies that are already serialized are passed through unchanged
+        if isinstance(data, str):
+            return data
+        
+        try:
+            return orjson.dumps(data, default=self.default, option=ORJSON_OPTIONS).decode()
+        except (TypeError, ValueError) as e:
+            raise SerializationError(data, e)
+
+
+# Serializer shared by the client and the bulk size estimate
+_serializer = OrjsonSerializer()
+
+
+@functools.lru_cache(maxsize=1)
+def _get_boto_session() -> boto3.Session:
+    """
+    Return the shared boto3 session, so the AWS config files and credential
+    provider chain are only resolved once per process.
+    
+    Returns:
+        boto3.Session: The boto3 session
+    """
+    return boto3.Session()
+
 
 def get_opensearch_client() -> OpenSearch:
     """
-    Create and return an OpenSearch client.
+    Return the shared OpenSearch client, creating it on first use.
+    
+    Returns:
+        OpenSearch: The OpenSearch client instance
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = _create_opensearch_client()
+    return _client
+
+
+def _create_opensearch_client() -> OpenSearch:
+    """
+    Create a new OpenSearch client.
     
     Returns:
         OpenSearch: The OpenSearch client instance
@@ -34,16 +169,21 @@ def get_opensearch_client() -> OpenSearch:
             'hosts': [{'host': OPENSEARCH_ENDPOINT, 'port': OPENSEARCH_PORT}],
             'use_ssl': OPENSEARCH_USE_SSL,
             'verify_certs': OPENSEARCH_VERIFY_CERTS,
-            'connection_class': RequestsHttpConnection
+            'connection_class': RequestsHttpConnection,
+            'http_compress': OPENSEARCH_HTTP_COMPRESS,
+            'serializer': _serializer,
+            # Size the connection pool for parallel_bulk's worker threads
+            'pool_maxsize': OPENSEARCH_INDEX_THREADS
         }
         
         # If using AWS auth, set up the connection with IAM credentials
         if USE_AWS_AUTH:
             logger.info("Initializing OpenSearch client with AWS auth")
-            credentials = boto3.Session().get_credentials()
-            connection_params['http_auth'] = ('admin', 'admin')  # Replace with IAM auth
-            connection_params['connection_class'] = AWSHTTP
-            connection_params['region'] = AWS_REGION
+            # The session caches its credentials; temporary (refreshable) credentials are
+            # renewed by botocore when they near expiry, and the signer reads the current
+            # values for every request
+            credentials = _get_boto_session().get_credentials()
+            connection_params['http_auth'] = AWSV4SignerAuth(credentials, AWS_REGION, 'es')
         else:
             logger.info("Initializing OpenSearch client without AWS auth")
             # Add basic auth if needed
@@ -59,11 +199,50 @@ def get_opensearch_client() -> OpenSearch:
         return client
     
     except Exception as e:
-        logger.error(f"Error creating OpenSearch client: {str(e)}")
+        logger.error("Error creating OpenSearch client: %s", e)
         # Return None on error, which will be handled by the calling function
         raise
 
 
+def _vector_encoder() -> Dict[str, Any]:
+    """
+    Build the faiss encoder parameters for the configured vector quantization.
+    
+    Returns:
+        Dict[str, Any]: The encoder parameters (empty for full-precision vectors)
+    """
+    if OPENSEARCH_VECTOR_QUANT == 'fp16':
+        return {"encoder": {"name": "sq", "parameters": {"type": "fp16"}}}
+    if OPENSEARCH_VECTOR_QUANT == 'none':
+        return {}
+    # Product quantization needs a trained model, which this mapping cannot reference
+    raise ValueError(f"Unsupported OPENSEARCH_VECTOR_QUANT: {OPENSEARCH_VECTOR_QUANT} (expected fp16 or none)")
+
+
+def index_exists(client: OpenSearch, index_name: str) -> bool:
+    """
+    Check whether an index exists, remembering positive answers for the process.
+    
+    Indices are not expected to disappear while the application runs, so only
+    the first check per index costs a round trip to the cluster.
+    
+    Args:
+        client (OpenSearch): The OpenSearch client
+        index_name (str): The name of the index to check
+        
+    Returns:
+        bool: True if the index exists
+    """
+    if index_name in _index_ready:
+        return True
+    
+    if client.indices.exists(index=index_name):
+        with _index_lock:
+            _index_ready.add(index_name)
+        return True
+    return False
+
+
 def create_index_if_not_exists(client: OpenSearch, index_name: str) -> None:
     """
     Create an OpenSearch index if it doesn't already exist.
@@ -72,55 +251,135 @@ def create_index_if_not_exists(client: OpenSearch, index_name: str) -> None:
         client (OpenSearch): The OpenSearch client
         index_name (str): The name of the index to create
     """
+    if index_name in _index_ready:
+        return
+    
     try:
-        if not client.indices.exists(index=index_name):
-            logger.info(f"Creating index: {index_name}")
-            
-            # Define index settings with vector search capabilities
-            index_settings = {
-                "settings": {
-                    "index": {
-                        "number_of_shards": 2,
-                        "number_of_replicas": 1,
-                        "knn": True
-                    }
-                },
-                "mappings": {
-                    "properties": {
-                        "id": {"type": "keyword"},
-                        "content": {"type": "text"},
-                        "metadata": {"type": "object"},
-                        "embedding": {
-                            "type": "knn_vector",
-                            "dimension": 1536,  # Adjust based on your embedding model
-                            "method": {
-                                "name": "hnsw",
-                                "space_type": "cosinesimil",
-                                "engine": "nmslib"
-                            }
+        with _index_lock:
+            if index_name in _index_ready:
+                return
+            _create_index(client, index_name)
+            _index_ready.add(index_name)
+    
+    except Exception as e:
+        logger.error("Error creating index: %s", e)
+        raise
+
+
+def _index_body() -> Dict[str, Any]:
+    """
+    Build the settings and k-NN mapping used for document indices.
+    
+    Returns:
+        Dict[str, Any]: The index creation body
+    """
+    return {
+        "settings": {
+            "index": {
+                "number_of_shards": 2,
+                "number_of_replicas": 1,
+                "knn": True
+            }
+        },
+        "mappings": {
+            # Keep the embedding out of the stored _source, so fetching hits only parses
+            # id, content and metadata instead of 1536 floats per document. The vector is
+            # still searchable from the k-NN index, but it can no longer be recovered from
+            # _source (reindex or update-by-query would drop it; re-embed instead).
+            "_source": {
+                "excludes": ["embedding"]
+            },
+            "properties": {
+                "id": {"type": "keyword"},
+                "content": {"type": "text"},
+                "metadata": {"type": "object"},
+                "embedding": {
+                    "type": "knn_vector",
+                    "dimension": EMBEDDING_DIMENSION,
+                    "method": {
+                        "name": "hnsw",
+                        "space_type": VECTOR_SPACE_TYPE,
+                        "engine": "faiss",
+                        "parameters": {
+                            "ef_construction": HNSW_EF_CONSTRUCTION,
+                            "m": HNSW_M,
+                            **_vector_encoder()
                         }
                     }
                 }
             }
-            
-            # Create the index
-            client.indices.create(index=index_name, body=index_settings)
-            logger.info(f"Successfully created index: {index_name}")
-        else:
-            logger.info(f"Index {index_name} already exists")
+        }
+    }
+
+
+def _create_index(client: OpenSearch, index_name: str) -> None:
+    """
+    Create the index with its k-NN mapping unless it already exists.
     
-    except Exception as e:
-        logger.error(f"Error creating index: {str(e)}")
-        raise
+    Args:
+        client (OpenSearch): The OpenSearch client
+        index_name (str): The name of the index to create
+    """
+    if not client.indices.exists(index=index_name):
+        logger.info("Creating index: %s", index_name)
+        
+        # Create the index with vector search capabilities
+        client.indices.create(index=index_name, body=_index_body())
+        logger.info("Successfully created index: %s", index_name)
+    else:
+        logger.info("Index %s already exists", index_name)
+
 
+def normalize_embeddings(embeddings: Union["np.ndarray", List[List[float]]]) -> "np.ndarray":
+    """
+    L2-normalize a batch of embeddings, leaving all-zero vectors unchanged.
+    
+    Args:
+        embeddings (Union[np.ndarray, List[List[float]]]): The embedding vectors, all
+            of the same dimension; the caller's array is not modified
+        
+    Returns:
+        np.ndarray: A float32 matrix with one unit-length row per embedding
+    """
+    import numpy as np
+    
+    matrix = np.array(embeddings, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    matrix /= norms
+    return matrix
 
-def index_document(document: Dict[str, Any], embedding: List[float]) -> bool:
+
+def normalize_embedding(embedding: List[float]) -> List[float]:
+    """
+    L2-normalize a single embedding, leaving an all-zero vector unchanged.
+    
+    Args:
+        embedding (List[float]): The embedding vector
+        
+    Returns:
+        List[float]: The unit-length embedding
+    """
+    norm = math.sqrt(math.fsum(value * value for value in embedding))
+    if norm == 0:
+        return list(embedding)
+    return [value / norm for value in embedding]
+
+
+def index_document(document: Dict[str, Any], embedding: List[float],
+                   refresh: Union[bool, str] = False) -> bool:
     """
     Index a document with its embedding in OpenSearch.
     
+    By default the document becomes searchable at the next scheduled refresh,
+    since forcing a refresh per document builds a new segment (and HNSW graph)
+    each time. Pass refresh="wait_for" to block until it is searchable without
+    forcing a refresh, or refresh=True to force one (e.g. in tests).
+    
     Args:
         document (Dict[str, Any]): The document to index
         embedding (List[float]): The embedding vector for the document
+        refresh (Union[bool, str]): Refresh policy: False, True or "wait_for"
         
     Returns:
         bool: True if indexing was successful, False otherwise
@@ -132,12 +391,16 @@ def index_document(document: Dict[str, Any], embedding: List[float]) -> bool:
         # Ensure the index exists
         create_index_if_not_exists(client, OPENSEARCH_INDEX)
         
-        # Prepare the document with its embedding
+        if not embedding:
+            logger.warning("Skipping document %s without an embedding", document.get("id", ""))
+            return False
+        
+        # Prepare the document with its unit-length embedding
         doc_with_embedding = {
             "id": document.get("id", ""),
             "content": document.get("content", ""),
             "metadata": document.get("metadata", {}),
-            "embedding": embedding
+            "embedding": normalize_embedding(embedding)
         }
         
         # Index the document
@@ -145,24 +408,93 @@ def index_document(document: Dict[str, Any], embedding: List[float]) -> bool:
             index=OPENSEARCH_INDEX,
             body=doc_with_embedding,
             id=document.get("id", None),
-            refresh=True  # Immediate refresh for testing
+            refresh=refresh
         )
         
-        logger.info(f"Successfully indexed document with ID: {response['_id']}")
+        logger.info("Successfully indexed document with ID: %s", response['_id'])
         return True
     
     except Exception as e:
-        logger.error(f"Error indexing document: {str(e)}")
+        logger.error("Error indexing document: %s", e)
         return False
 
 
-def search_vectors(embedding: List[float], k: int = MAX_SEARCH_RESULTS) -> List[Dict[str, Any]]:
+def _source_fields(return_content: bool = True) -> List[str]:
+    """
+    List the _source fields to fetch for each hit.
+    
+    Args:
+        return_content (bool): Fetch the document content
+        
+    Returns:
+        List[str]: The _source includes
+    """
+    return ["id", "content", "metadata"] if return_content else ["id", "metadata"]
+
+
+def _knn_query(embedding: List[float], k: int, ef_search: Optional[int] = None,
+               return_content: bool = True) -> Dict[str, Any]:
+    """
+    Build a k-NN search body for a query embedding.
+    
+    Args:
+        embedding (List[float]): The query embedding vector
+        k (int): Maximum number of results to return
+        ef_search (Optional[int]): HNSW candidate list size, or None for the index default
+        return_content (bool): Fetch the document content
+        
+    Returns:
+        Dict[str, Any]: The search body
+    """
+    knn = {
+        "vector": normalize_embedding(embedding),
+        "k": k
+    }
+    if ef_search:
+        knn["method_parameters"] = {"ef_search": ef_search}
+    
+    return {
+        "size": k,
+        "query": {
+            "knn": {
+                "embedding": knn
+            }
+        },
+        "_source": _source_fields(return_content)
+    }
+
+
+def _hit_to_result(hit: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Convert a search hit into a result document.
+    
+    Args:
+        hit (Dict[str, Any]): A hit from a search response
+        
+    Returns:
+        Dict[str, Any]: The result with id, content, metadata and score
+    """
+    source = hit.get("_source", {})
+    return {
+        "id": source.get("id", ""),
+        "content": source.get("content", ""),
+        "metadata": source.get("metadata", {}),
+        "score": hit["_score"]
+    }
+
+
+def search_vectors(embedding: List[float], k: int = MAX_SEARCH_RESULTS,
+                   ef_search: Optional[int] = HNSW_EF_SEARCH,
+                   return_content: bool = True) -> List[Dict[str, Any]]:
     """
     Search for similar documents in OpenSearch using vector similarity.
     
     Args:
         embedding (List[float]): The query embedding vector
         k (int): Maximum number of results to return
+        ef_search (Optional[int]): HNSW candidate list size, or None for the index default
+        return_content (bool): Fetch the document content; turn off for lightweight
+            queries that only need ids, metadata and scores
         
     Returns:
         List[Dict[str, Any]]: List of matching documents
@@ -171,23 +503,115 @@ def search_vectors(embedding: List[float], k: int = MAX_SEARCH_RESULTS) -> List[
         # Get the OpenSearch client
         client = get_opensearch_client()
         
-        # Check if the index exists
-        if not client.indices.exists(index=OPENSEARCH_INDEX):
-            logger.warning(f"Index {OPENSEARCH_INDEX} does not exist")
+        # Check if the index exists (cached once seen)
+        if not index_exists(client, OPENSEARCH_INDEX):
+            logger.warning("Index %s does not exist", OPENSEARCH_INDEX)
             return []
         
-        # Prepare the search query with vector similarity
+        # Execute the search with vector similarity on the unit-length embedding
+        response = client.search(
+            index=OPENSEARCH_INDEX,
+            body=_knn_query(embedding, k, ef_search, return_content)
+        )
+        
+        # Process and return the search results
+        results = [_hit_to_result(hit) for hit in response["hits"]["hits"]]
+        
+        logger.info("Search returned %s results", len(results))
+        return results
+    
+    except Exception as e:
+        logger.error("Error searching vectors: %s", e)
+        return []
+
+
+def search_vectors_batch(embeddings: List[List[float]], k: int = MAX_SEARCH_RESULTS,
+                         ef_search: Optional[int] = HNSW_EF_SEARCH,
+                         return_content: bool = True) -> List[List[Dict[str, Any]]]:
+    """
+    Run several vector similarity searches in a single _msearch round trip.
+    
+    Useful when one request fans out into several sub-queries (query expansion,
+    HyDE), since the HTTP and request signing overhead is paid once for all of them.
+    
+    Args:
+        embeddings (List[List[float]]): The query embedding vectors
+        k (int): Maximum number of results to return per query
+        ef_search (Optional[int]): HNSW candidate list size, or None for the index default
+        return_content (bool): Fetch the document content
+        
+    Returns:
+        List[List[Dict[str, Any]]]: One result list per query, in input order
+    """
+    if not embeddings:
+        return []
+    
+    try:
+        # Get the OpenSearch client
+        client = get_opensearch_client()
+        
+        # Check if the index exists (cached once seen)
+        if not index_exists(client, OPENSEARCH_INDEX):
+            logger.warning("Index %s does not exist", OPENSEARCH_INDEX)
+            return [[] for _ in embeddings]
+        
+        # Pair a header line with a k-NN body for every query
+        body = []
+        for embedding in embeddings:
+            body.append({"index": OPENSEARCH_INDEX})
+            body.append(_knn_query(embedding, k, ef_search, return_content))
+        
+        # Execute all searches at once; responses come back in request order
+        response = client.msearch(body=body)
+        
+        # Process the search results, keeping failed queries as empty lists
+        results = []
+        for item in response["responses"]:
+            if "error" in item:
+                logger.warning("Search in batch failed: %s", item["error"])
+                results.append([])
+            else:
+                results.append([_hit_to_result(hit) for hit in item["hits"]["hits"]])
+        
+        logger.info("Batch search returned results for %s queries", len(results))
+        return results
+    
+    except Exception as e:
+        logger.error("Error batch searching vectors: %s", e)
+        return [[] for _ in embeddings]
+
+
+def keyword_search(query: str, k: int = MAX_SEARCH_RESULTS,
+                   return_content: bool = True) -> List[Dict[str, Any]]:
+    """
+    Search for documents matching the query text using BM25 keyword relevance.
+    
+    Args:
+        query (str): The raw query text
+        k (int): Maximum number of results to return
+        return_content (bool): Fetch the document content
+        
+    Returns:
+        List[Dict[str, Any]]: List of matching documents
+    """
+    try:
+        # Get the OpenSearch client
+        client = get_opensearch_client()
+        
+        # Check if the index exists (cached once seen)
+        if not index_exists(client, OPENSEARCH_INDEX):
+            logger.warning("Index %s does not exist", OPENSEARCH_INDEX)
+            return []
+        
+        # Prepare the full-text search query
         search_query = {
             "size": k,
             "query": {
-                "knn": {
-                    "embedding": {
-                        "vector": embedding,
-                        "k": k
-                    }
+                "match": {
+                    "content": query
                 }
             },
-            "_source": ["id", "content", "metadata"]
+            "_source": _source_fields(return_content)
         }
         
         # Execute the search
@@ -197,30 +621,264 @@ def search_vectors(embedding: List[float], k: int = MAX_SEARCH_RESULTS) -> List[
         )
         
         # Process and return the search results
-        results = []
-        for hit in response["hits"]["hits"]:
-            results.append({
-                "id": hit["_source"].get("id", ""),
-                "content": hit["_source"].get("content", ""),
-                "metadata": hit["_source"].get("metadata", {}),
-                "score": hit["_score"]
-            })
-        
-        logger.info(f"Search returned {len(results)} results")
+        results = [_hit_to_result(hit) for hit in response["hits"]["hits"]]
+        
+        logger.info("Keyword search returned %s results", len(results))
         return results
     
     except Exception as e:
-        logger.error(f"Error searching vectors: {str(e)}")
+        logger.error("Error running keyword search: %s", e)
         return []
 
 
-def batch_index_documents(documents: List[Dict[str, Any]], embeddings: List[List[float]]) -> bool:
+def reciprocal_rank_fusion(result_lists: List[List[Dict[str, Any]]], k: int = MAX_SEARCH_RESULTS,
+                           rank_constant: int = 60) -> List[Dict[str, Any]]:
+    """
+    Merge several ranked result lists using reciprocal rank fusion.
+    
+    Each document scores sum(1 / (rank_constant + rank)) over the lists it appears in,
+    so documents ranked highly by more than one retriever rise to the top.
+    
+    Args:
+        result_lists (List[List[Dict[str, Any]]]): Ranked result lists to merge
+        k (int): Maximum number of results to return
+        rank_constant (int): Damping constant for lower-ranked results
+        
+    Returns:
+        List[Dict[str, Any]]: The fused results, with "score" set to the fused score
+    """
+    fused: Dict[str, Dict[str, Any]] = {}
+    
+    for results in result_lists:
+        for rank, result in enumerate(results, start=1):
+            # Fall back to the content for documents indexed without an ID
+            key = result.get("id") or result.get("content", "")
+            if key not in fused:
+                fused[key] = {**result, "score": 0.0}
+            fused[key]["score"] += 1.0 / (rank_constant + rank)
+    
+    return sorted(fused.values(), key=lambda result: result["score"], reverse=True)[:k]
+
+
+@contextmanager
+def bulk_ingest_context(client: OpenSearch, index_name: str) -> Iterator[None]:
+    """
+    Tune an index for bulk loading for the duration of the block.
+    
+    On entry, refresh is disabled, replicas are dropped and the translog flush
+    threshold is raised. On exit, the previous settings are restored and the
+    index is force-merged into one segment and refreshed, so the HNSW graph is
+    built once instead of for every small segment.
+    
+    Args:
+        client (OpenSearch): The OpenSearch client
+        index_name (str): The name of the index being loaded
+    """
+    create_index_if_not_exists(client, index_name)
+    
+    # Remember the current values; None resets a setting to its default on restore
+    current = client.indices.get_settings(index=index_name)[index_name]["settings"]["index"]
+    previous = {
+        "refresh_interval": current.get("refresh_interval"),
+        "number_of_replicas": current.get("number_of_replicas"),
+        "translog.flush_threshold_size": current.get("translog", {}).get("flush_threshold_size")
+    }
+    
+    logger.info("Disabling refresh and replicas on %s for bulk ingest", index_name)
+    client.indices.put_settings(index=index_name, body={"index": BULK_INGEST_SETTINGS})
+    
+    try:
+        yield
+    finally:
+        logger.info("Restoring settings and merging segments on %s", index_name)
+        client.indices.put_settings(index=index_name, body={"index": previous})
+        client.indices.forcemerge(index=index_name, max_num_segments=1, request_timeout=FORCEMERGE_TIMEOUT)
+        client.indices.refresh(index=index_name)
+
+
+def clamp_chunk_size(sample_sources: List[Dict[str, Any]], chunk_size: int, max_chunk_bytes: int) -> int:
+    """
+    Limit the bulk chunk size so that an average chunk fits in max_chunk_bytes.
+    
+    Args:
+        sample_sources (List[Dict[str, Any]]): A sample of the documents to be indexed
+        chunk_size (int): The requested number of documents per bulk request
+        max_chunk_bytes (int): The maximum size of a bulk request in bytes
+        
+    Returns:
+        int: The chunk size to use
+    """
+    if not sample_sources:
+        return chunk_size
+    
+    # Serialize as the client would, including Decimal, date and numpy values
+    avg_doc_size = sum(
+        len(orjson.dumps(source, default=_serializer.default, option=ORJSON_OPTIONS))
+        for source in sample_sources
+    ) / len(sample_sources)
+    max_docs = max(1, int(max_chunk_bytes // avg_doc_size))
+    
+    if max_docs < chunk_size:
+        logger.info("Reducing bulk chunk size from %s to %s (average document size %.0f bytes)",
+                    chunk_size, max_docs, avg_doc_size)
+        return max_docs
+    return chunk_size
+
+
+def build_tuning_actions(sample_documents: List[Dict[str, Any]], count: int) -> List[Dict[str, Any]]:
+    """
+    Build bulk actions for chunk size tuning from sample documents.
+    
+    The sample documents are cycled to reach count actions and paired with rows of
+    a random float32 unit-vector matrix, so tuning needs no embedding calls.
+    
+    Args:
+        sample_documents (List[Dict[str, Any]]): Documents whose content is reused
+        count (int): Number of actions to build
+        
+    Returns:
+        List[Dict[str, Any]]: Bulk actions without a target index
+    """
+    import numpy as np
+    
+    vectors = normalize_embeddings(
+        np.random.default_rng().standard_normal((count, EMBEDDING_DIMENSION), dtype=np.float32)
+    )
+    
+    actions = []
+    for i, vector in enumerate(vectors):
+        doc = sample_documents[i % len(sample_documents)] if sample_documents else {}
+        actions.append({
+            "_source": {
+                "id": f"tune-{i}",
+                "content": doc.get("content", ""),
+                "metadata": doc.get("metadata", {}),
+                "embedding": vector
+            }
+        })
+    return actions
+
+
+def autotune_chunk_size(client: OpenSearch, sample_actions: List[Dict[str, Any]],
+                        candidates: Iterable[int] = AUTOTUNE_CANDIDATES) -> int:
     """
-    Batch index multiple documents with their embeddings.
+    Pick the bulk chunk size with the best indexing throughput on this cluster.
+    
+    Candidates are first clamped to what fits in OPENSEARCH_BULK_MAX_CHUNK_BYTES
+    for the sample's document size, since larger ones would send the same requests.
+    Each remaining candidate indexes up to twice its size of the sample actions into
+    a throwaway index, created with the document mapping and bulk ingest settings
+    and deleted afterwards. The fastest candidate without errors wins.
+    
+    Args:
+        client (OpenSearch): The OpenSearch client
+        sample_actions (List[Dict[str, Any]]): Bulk actions to index during the probe
+        candidates (Iterable[int]): Chunk sizes to try
+        
+    Returns:
+        int: The winning chunk size, or OPENSEARCH_BULK_CHUNK_SIZE if every probe failed
+    """
+    best_size, best_rate = OPENSEARCH_BULK_CHUNK_SIZE, 0.0
+    body = _index_body()
+    body["settings"]["index"].update(BULK_INGEST_SETTINGS)
+    
+    # Only probe chunk sizes that actually differ once the byte limit applies
+    sample_sources = [action["_source"] for action in sample_actions[:BULK_SIZE_SAMPLE_DOCS]]
+    candidates = sorted({
+        clamp_chunk_size(sample_sources, candidate, OPENSEARCH_BULK_MAX_CHUNK_BYTES)
+        for candidate in candidates
+    })
+    
+    for candidate in candidates:
+        tune_index = f"{OPENSEARCH_INDEX}-tune-{uuid.uuid4().hex}"
+        actions = [{**action, "_index": tune_index} for action in sample_actions[:candidate * 2]]
+        if not actions:
+            break
+        
+        try:
+            client.indices.create(index=tune_index, body=body)
+            start = time.perf_counter()
+            success, errors = bulk(client, actions,
+                                   chunk_size=candidate,
+                                   max_chunk_bytes=OPENSEARCH_BULK_MAX_CHUNK_BYTES,
+                                   stats_only=True,
+                                   raise_on_error=False,
+                                   refresh=False)
+            rate = success / (time.perf_counter() - start)
+            logger.info("Chunk size %s: %.0f docs/s, %s errors", candidate, rate, errors)
+            
+            if not errors and rate > best_rate:
+                best_size, best_rate = candidate, rate
+        
+        except Exception as e:
+            logger.warning("Chunk size probe %s failed: %s", candidate, e)
+        
+        finally:
+            client.indices.delete(index=tune_index, ignore=404)
+    
+    logger.info("Selected bulk chunk size %s", best_size)
+    return best_size
+
+
+def get_tuned_chunk_size(client: OpenSearch, sample_documents: List[Dict[str, Any]],
+                         index_name: str = OPENSEARCH_INDEX) -> int:
+    """
+    Return the autotuned bulk chunk size for an index, probing only on a cache miss.
+    
+    Args:
+        client (OpenSearch): The OpenSearch client
+        sample_documents (List[Dict[str, Any]]): Documents to build probe actions from
+        index_name (str): The index the chunk size is tuned for
+        
+    Returns:
+        int: The bulk chunk size to use
+    """
+    cache_key = f"{OPENSEARCH_ENDPOINT}:{OPENSEARCH_PORT}/{index_name}"
+    
+    try:
+        with open(AUTOTUNE_CACHE_PATH, 'rb') as f:
+            cache = orjson.loads(f.read())
+    except (OSError, orjson.JSONDecodeError):
+        cache = {}
+    
+    if cache_key in cache:
+        logger.info("Using cached bulk chunk size %s for %s", cache[cache_key], cache_key)
+        return cache[cache_key]
+    
+    sample_actions = build_tuning_actions(sample_documents, max(AUTOTUNE_CANDIDATES) * 2)
+    cache[cache_key] = autotune_chunk_size(client, sample_actions)
+    
+    try:
+        os.makedirs(os.path.dirname(AUTOTUNE_CACHE_PATH), exist_ok=True)
+        with open(AUTOTUNE_CACHE_PATH, 'wb') as f:
+            f.write(orjson.dumps(cache))
+    except OSError as e:
+        logger.warning("Could not cache bulk chunk size: %s", e)
+    
+    return cache[cache_key]
+
+
+def batch_index_documents(documents: List[Dict[str, Any]],
+                          embeddings: Union["np.ndarray", List[List[float]]],
+                          thread_count: int = OPENSEARCH_INDEX_THREADS,
+                          chunk_size: int = OPENSEARCH_BULK_CHUNK_SIZE,
+                          max_chunk_bytes: int = OPENSEARCH_BULK_MAX_CHUNK_BYTES,
+                          queue_size: int = OPENSEARCH_BULK_QUEUE_SIZE,
+                          refresh: bool = False) -> bool:
+    """
+    Batch index multiple documents with their embeddings, sending bulk requests
+    from several threads in parallel.
     
     Args:
         documents (List[Dict[str, Any]]): List of documents to index
-        embeddings (List[List[float]]): List of embedding vectors for the documents
+        embeddings (Union[np.ndarray, List[List[float]]]): Embedding vectors for the
+            documents, either an (N, D) matrix or a list with empty entries for failed embeddings
+        thread_count (int): Number of threads sending bulk requests
+        chunk_size (int): Maximum number of documents per bulk request
+        max_chunk_bytes (int): Maximum size of a bulk request in bytes
+        queue_size (int): Number of chunks queued ahead of the worker threads
+        refresh (bool): Refresh the index after each bulk request; leave off for large
+            loads and wrap them in bulk_ingest_context instead
         
     Returns:
         bool: True if indexing was successful, False otherwise
@@ -236,26 +894,67 @@ def batch_index_documents(documents: List[Dict[str, Any]], embeddings: List[List
         # Ensure the index exists
         create_index_if_not_exists(client, OPENSEARCH_INDEX)
         
-        # Prepare the bulk indexing actions
-        actions = []
-        for i, doc in enumerate(documents):
-            actions.append({
-                "_index": OPENSEARCH_INDEX,
-                "_id": doc.get("id", None),
-                "_source": {
-                    "id": doc.get("id", ""),
-                    "content": doc.get("content", ""),
-                    "metadata": doc.get("metadata", {}),
-                    "embedding": embeddings[i]
+        import numpy as np
+        
+        # Drop documents whose embedding failed (only possible for lists), then
+        # normalize the rest into one contiguous float32 matrix; skipped documents
+        # count as failures
+        skipped = 0
+        if not isinstance(embeddings, np.ndarray):
+            pairs = [(doc, embedding) for doc, embedding in zip(documents, embeddings) if len(embedding)]
+            skipped = len(documents) - len(pairs)
+            if skipped:
+                logger.warning("Skipping %s documents without an embedding", skipped)
+            documents = [doc for doc, _ in pairs]
+            embeddings = [embedding for _, embedding in pairs]
+        if not documents:
+            return False
+        vectors = normalize_embeddings(embeddings)
+        
+        # Build the bulk indexing actions on demand, so parallel_bulk only holds the
+        # chunks in flight instead of a second copy of every embedding
+        def generate_actions() -> Iterator[Dict[str, Any]]:
+            # Bind the lookups locally and read each field once; this runs per document
+            get = dict.get
+            index_name = OPENSEARCH_INDEX
+            for doc, vector in zip(documents, vectors):
+                doc_id = get(doc, "id")
+                yield {
+                    "_index": index_name,
+                    "_id": doc_id,
+                    "_source": {
+                        "id": "" if doc_id is None else doc_id,
+                        "content": get(doc, "content", ""),
+                        "metadata": get(doc, "metadata", {}),
+                        # Rows are serialized straight from the matrix by OrjsonSerializer
+                        "embedding": vector
+                    }
                 }
-            })
         
-        # Execute the bulk indexing
-        success, failed = bulk(client, actions, refresh=True)
+        # Keep each bulk request under max_chunk_bytes for the typical document size
+        chunk_size = clamp_chunk_size(
+            [action["_source"] for action in islice(generate_actions(), BULK_SIZE_SAMPLE_DOCS)],
+            chunk_size, max_chunk_bytes
+        )
+        
+        # Execute the bulk indexing, draining the per-document results
+        success, failed = 0, skipped
+        for ok, item in parallel_bulk(client, generate_actions(),
+                                      thread_count=thread_count,
+                                      chunk_size=chunk_size,
+                                      max_chunk_bytes=max_chunk_bytes,
+                                      queue_size=queue_size,
+                                      raise_on_error=False,
+                                      refresh=refresh):
+            if ok:
+                success += 1
+            else:
+                failed += 1
+                logger.warning("Failed to index document: %s", item)
         
-        logger.info(f"Bulk indexing completed. Success: {success}, Failed: {len(failed)}")
-        return len(failed) == 0
+        logger.info("Bulk indexing completed. Success: %s, Failed: %s", success, failed)
+        return failed == 0
     
     except Exception as e:
-        logger.error(f"Error batch indexing documents: {str(e)}")
+        logger.error("Error batch indexing documents: %s", e)
         return False